@@ -0,0 +1,123 @@
+"""Benchmark restart time: full database reload vs. snapshot + change replay.
+
+Usage:
+    python bench_reload.py [--reminders 1000000] [--changes 1000]
+
+Both restarts run the same steps as scheduler.reload_all_reminders, with a
+real JobQueue: once without a snapshot file (full reload from SQLite), once
+with one. Each phase is timed within the same pass:
+    load:            building the schedule (scheduler.load_schedule)
+    schedule:        creating the jobs (scheduler.schedule_records)
+    start job queue: APScheduler filing the pending jobs into its job store
+"""
+import argparse
+import asyncio
+import random
+import tempfile
+import time as timer
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from telegram.ext import ApplicationBuilder
+
+import db_utils
+import scheduler
+
+
+def populate(count: int):
+    """Fill the database with `count` reminders spread over 1000 users."""
+    now = datetime.now(timezone.utc)
+    rng = random.Random(0)
+    with db_utils.get_conn() as conn:
+        cur = conn.cursor()
+        cur.executemany(
+            "INSERT INTO users (id, timezone_offset) VALUES (?, ?)",
+            ((user_id, rng.randint(-12, 14)) for user_id in range(1, 1001)),
+        )
+        rows = []
+        for i in range(count):
+            user_id = rng.randint(1, 1000)
+            if i % 2:
+                rows.append((user_id, "daily", rng.randint(0, 23), rng.randint(0, 59), None, f"Daily reminder {i}"))
+            else:
+                run_at = now + timedelta(minutes=rng.randint(60, 60 * 24 * 365))
+                rows.append((user_id, "once", None, None, run_at.isoformat(), f"Reminder {i}"))
+        cur.executemany(
+            "INSERT INTO reminders (user_id, type, hour, minute, run_at, text) VALUES (?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+        conn.commit()
+
+
+def change_reminders(count: int):
+    """Simulate activity between the snapshot and the restart."""
+    with db_utils.get_conn() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT id FROM reminders ORDER BY random() LIMIT ?", (count,))
+        ids = [row[0] for row in cur.fetchall()]
+        half = len(ids) // 2
+        cur.executemany("DELETE FROM reminders WHERE id = ?", ((i,) for i in ids[:half]))
+        cur.executemany("UPDATE reminders SET text = text || ' (edited)' WHERE id = ?", ((i,) for i in ids[half:]))
+        conn.commit()
+
+
+def measure(label: str, func):
+    start = timer.perf_counter()
+    result = func()
+    elapsed = timer.perf_counter() - start
+    print(f"{label:<36} {elapsed:8.3f}s", flush=True)
+    return result, elapsed
+
+
+async def restart(label: str):
+    """Time one restart of a fresh application, phase by phase, returning the application."""
+    app = ApplicationBuilder().token("123456:BENCH").build()
+
+    (records, seq, snapshot_seq), load = measure(f"{label}: load", scheduler.load_schedule)
+    _, schedule = measure(f"{label}: schedule", lambda: scheduler.schedule_records(app, records))
+    app.bot_data.update(schedule=records, schedule_seq=seq, snapshot_seq=snapshot_seq)
+
+    # Starting the job queue is when APScheduler files the pending jobs into its job store
+    start = timer.perf_counter()
+    await app.job_queue.start()
+    job_store = timer.perf_counter() - start
+    print(f"{label + ': start job queue':<36} {job_store:8.3f}s")
+    print(f"{label + ': total restart':<36} {load + schedule + job_store:8.3f}s")
+    print(f"{'':<36} {len(app.job_queue.jobs())} jobs, {len(app.bot_data['deferred'])} reminders deferred\n",
+          flush=True)
+    await app.job_queue.stop(wait=False)
+    return app
+
+
+async def run(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_utils.DB_FILE = Path(tmp) / "reminders.db"
+        scheduler.SNAPSHOT_FILE = Path(tmp) / "reminders.snapshot"
+
+        db_utils.init_db()
+        measure(f"populate {args.reminders} reminders", lambda: populate(args.reminders))
+        print()
+
+        app = await restart("full DB reload")
+
+        start = timer.perf_counter()
+        await scheduler.save_schedule_snapshot(app)
+        print(f"{'write snapshot':<36} {timer.perf_counter() - start:8.3f}s")
+        print(f"{'snapshot size':<36} {scheduler.SNAPSHOT_FILE.stat().st_size / 2**20:8.1f}MiB")
+        measure(f"change {args.changes} reminders", lambda: change_reminders(args.changes))
+        print()
+
+        await restart("snapshot + replay")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reminders", type=int, default=1_000_000)
+    parser.add_argument("--changes", type=int, default=1000)
+    args = parser.parse_args()
+
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
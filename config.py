@@ -1,15 +1,29 @@
 import logging
 from dotenv import load_dotenv
 import os
+from pathlib import Path
 
 load_dotenv()
 
 # Telegram Bot Token
 TOKEN = os.getenv("TELEGRAM_TOKEN")
 
+# Bot API base URL, e.g. "http://127.0.0.1:8081/bot" for fake_bot_api.py (default: Telegram)
+API_URL = os.getenv("TELEGRAM_API_URL")
+
 # Logging configuration
 logging.basicConfig(level=logging.INFO)
+# APScheduler logs every job it adds and runs at INFO level
+logging.getLogger("apscheduler").setLevel(logging.WARNING)
 
 # Constants
 MIN_UTC_OFFSET = -12
 MAX_UTC_OFFSET = 14
+
+# Scheduler snapshot
+SNAPSHOT_FILE = Path(os.getenv("SNAPSHOT_FILE", "reminders.snapshot"))
+SNAPSHOT_INTERVAL = int(os.getenv("SNAPSHOT_INTERVAL", "300"))  # seconds
+
+# One-time reminders further away than this are only handed to the job queue
+# once they come within range (see scheduler.schedule_deferred_reminders)
+SCHEDULE_HORIZON = int(os.getenv("SCHEDULE_HORIZON", "86400"))  # seconds
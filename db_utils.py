@@ -1,4 +1,5 @@
 import sqlite3
+import uuid
 from pathlib import Path
 
 DB_FILE = Path("reminders.db")
@@ -32,6 +33,47 @@ def init_db():
             FOREIGN KEY (user_id) REFERENCES users(id)
         )
         """)
+        # Random identity of this database, so a scheduler snapshot taken
+        # from another database is never mistaken for this one's
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        )
+        """)
+        cur.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('db_id', ?)", (uuid.uuid4().hex,))
+        # Change log used to replay only the rows modified since the last
+        # scheduler snapshot (see snapshot.py).
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS reminder_changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            reminder_id INTEGER NOT NULL
+        )
+        """)
+        cur.executescript("""
+        CREATE TRIGGER IF NOT EXISTS reminders_after_insert AFTER INSERT ON reminders
+        BEGIN
+            INSERT INTO reminder_changes (reminder_id) VALUES (NEW.id);
+        END;
+        CREATE TRIGGER IF NOT EXISTS reminders_after_update AFTER UPDATE ON reminders
+        BEGIN
+            INSERT INTO reminder_changes (reminder_id) VALUES (NEW.id);
+        END;
+        CREATE TRIGGER IF NOT EXISTS reminders_after_delete AFTER DELETE ON reminders
+        BEGIN
+            INSERT INTO reminder_changes (reminder_id) VALUES (OLD.id);
+        END;
+        CREATE TRIGGER IF NOT EXISTS users_after_insert AFTER INSERT ON users
+        BEGIN
+            INSERT INTO reminder_changes (reminder_id)
+            SELECT id FROM reminders WHERE user_id = NEW.id;
+        END;
+        CREATE TRIGGER IF NOT EXISTS users_after_timezone_update AFTER UPDATE OF timezone_offset ON users
+        BEGIN
+            INSERT INTO reminder_changes (reminder_id)
+            SELECT id FROM reminders WHERE user_id = NEW.id;
+        END;
+        """)
         conn.commit()
 
 
@@ -98,16 +140,80 @@ def delete_user_reminder(reminder_id: int):
         conn.commit()
 
 
+def delete_reminders(reminder_ids: list[int]):
+    """Delete several reminders by ID."""
+    with get_conn() as conn:
+        cur = conn.cursor()
+        cur.executemany("DELETE FROM reminders WHERE id = ?", ((reminder_id,) for reminder_id in reminder_ids))
+        conn.commit()
+
+
+REMINDER_SELECT = """
+    SELECT r.id, r.user_id, r.type, r.hour, r.minute, r.run_at, r.text, COALESCE(u.timezone_offset, 0)
+    FROM reminders r LEFT JOIN users u ON u.id = r.user_id
+"""
+
+
 def get_reminders():
-    """Get all reminders"""
+    """Get all reminders along with their owner's timezone offset."""
+    with get_conn() as conn:
+        cur = conn.cursor()
+        cur.execute(REMINDER_SELECT)
+        return cur.fetchall()
+
+
+def get_reminders_by_ids(reminder_ids: list[int]):
+    """Get the given reminders along with their owner's timezone offset."""
+    rows = []
+    with get_conn() as conn:
+        cur = conn.cursor()
+        # Stay below SQLite's bound parameter limit
+        for start in range(0, len(reminder_ids), 500):
+            chunk = reminder_ids[start:start + 500]
+            placeholders = ", ".join("?" * len(chunk))
+            cur.execute(f"{REMINDER_SELECT} WHERE r.id IN ({placeholders})", chunk)
+            rows.extend(cur.fetchall())
+    return rows
+
+
+# ---------- Change Log Operations ----------
+def get_db_id() -> bytes:
+    """Get the random 16-byte identity of this database."""
+    with get_conn() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT value FROM meta WHERE key = 'db_id'")
+        return bytes.fromhex(cur.fetchone()[0])
+
+
+def get_change_seq() -> int:
+    """Get the sequence number of the latest reminder change (0 if none)."""
+    with get_conn() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT seq FROM sqlite_sequence WHERE name = 'reminder_changes'")
+        row = cur.fetchone()
+        return row[0] if row else 0
+
+
+def get_changes_since(seq: int) -> tuple[list[int], int]:
+    """Get the IDs of reminders changed after `seq` and the latest sequence number."""
     with get_conn() as conn:
         cur = conn.cursor()
         cur.execute(
-            """
-            SELECT * FROM reminders r
-            """
+            "SELECT seq, reminder_id FROM reminder_changes WHERE seq > ? ORDER BY seq", (seq,)
         )
-        return cur.fetchall()
+        rows = cur.fetchall()
+    if not rows:
+        return [], seq
+    reminder_ids = list(dict.fromkeys(reminder_id for _, reminder_id in rows))
+    return reminder_ids, rows[-1][0]
+
+
+def prune_changes(seq: int):
+    """Delete change log entries already covered by a snapshot."""
+    with get_conn() as conn:
+        cur = conn.cursor()
+        cur.execute("DELETE FROM reminder_changes WHERE seq <= ?", (seq,))
+        conn.commit()
 
 
 def get_reminders_for_user(user_id: int):
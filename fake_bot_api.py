@@ -0,0 +1,242 @@
+"""A local stand-in for the Telegram Bot API, for load and soak testing.
+
+It implements just enough of the API for the bot to run against it:
+getMe, deleteWebhook, getUpdates (with long polling) and sendMessage.
+Any other method answers with a plain success. Updates are injected with
+`FakeBotAPI.push_update` (or over HTTP with a POST to /fake/pushUpdate
+with `user_id` and `text`), and every sendMessage is reported to the
+`on_send_message` callback.
+
+Point the bot at it with:
+    TELEGRAM_API_URL=http://127.0.0.1:8081/bot python main.py
+
+Run it standalone with:
+    python fake_bot_api.py [--port 8081] [--latency 0.05] [--error-rate 0.01] [--flood-rate 0.01]
+"""
+import argparse
+import json
+import logging
+import random
+import threading
+import time
+from collections import Counter, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Optional
+from urllib.parse import parse_qsl
+
+BOT_USER = {"id": 1, "is_bot": True, "first_name": "Reminder", "username": "FakeReminderBot"}
+
+# Methods that are subject to injected errors and flood limits. The startup
+# calls (getMe, deleteWebhook) are left alone so the bot can always start.
+FAULTY_METHODS = {"getUpdates", "sendMessage"}
+
+
+class APIServer(ThreadingHTTPServer):
+    """HTTP server with a listen backlog large enough for bursts of connections.
+
+    With the socketserver default of 5, concurrent requests beyond the backlog
+    are reset before reaching a handler: faults we did not ask for.
+    """
+    request_queue_size = 1024
+    daemon_threads = True
+
+
+class FakeBotAPI:
+    """In-memory Bot API state, served over HTTP by `start`."""
+
+    def __init__(self, latency: float = 0.0, error_rate: float = 0.0, flood_rate: float = 0.0,
+                 retry_after: int = 1, seed: Optional[int] = None):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.flood_rate = flood_rate
+        self.retry_after = retry_after
+        self.on_send_message: Optional[Callable[[int, str], None]] = None
+        self.stats = Counter()
+
+        self._random = random.Random(seed)
+        self._updates = deque()
+        self._next_update_id = 1
+        self._next_message_id = 1
+        self._cond = threading.Condition()
+        self._stats_lock = threading.Lock()
+        self._server = None
+
+    def _count(self, key: str, amount: int = 1):
+        with self._stats_lock:
+            self.stats[key] += amount
+
+    # ---------- Update Injection ----------
+    def push_update(self, user_id: int, text: str, language_code: str = "en"):
+        """Queue an incoming private text message, as if sent by `user_id`."""
+        with self._cond:
+            message = {
+                "message_id": self._next_message_id,
+                "date": int(time.time()),
+                "chat": {"id": user_id, "type": "private"},
+                "from": {"id": user_id, "is_bot": False, "first_name": f"User {user_id}",
+                         "language_code": language_code},
+                "text": text,
+            }
+            if text.startswith("/"):
+                command = text.split(" ", 1)[0]
+                message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(command)}]
+
+            self._updates.append({"update_id": self._next_update_id, "message": message})
+            self._next_update_id += 1
+            self._next_message_id += 1
+            self._count("updates_pushed")
+            self._cond.notify_all()
+
+    def pending_updates(self) -> int:
+        """Number of updates not yet confirmed by the bot."""
+        with self._cond:
+            return len(self._updates)
+
+    # ---------- API Methods ----------
+    def call(self, method: str, params: dict) -> tuple[int, dict]:
+        """Handle one API call and return the HTTP status and JSON response."""
+        self._count(f"calls:{method}")
+
+        if self.latency:
+            time.sleep(self._random.uniform(0, 2 * self.latency))
+
+        if method in FAULTY_METHODS:
+            roll = self._random.random()
+            if roll < self.flood_rate:
+                self._count("flood_responses")
+                return 429, {
+                    "ok": False,
+                    "error_code": 429,
+                    "description": f"Too Many Requests: retry after {self.retry_after}",
+                    "parameters": {"retry_after": self.retry_after},
+                }
+            if roll < self.flood_rate + self.error_rate:
+                self._count("error_responses")
+                return 500, {"ok": False, "error_code": 500, "description": "Internal Server Error"}
+
+        if method == "getMe":
+            result = BOT_USER
+        elif method == "getUpdates":
+            result = self._get_updates(params)
+        elif method == "sendMessage":
+            result = self._send_message(params)
+        else:
+            result = True
+        return 200, {"ok": True, "result": result}
+
+    def _get_updates(self, params: dict) -> list:
+        offset = int(params.get("offset", 0))
+        limit = int(params.get("limit", 100))
+        deadline = time.monotonic() + float(params.get("timeout", 0))
+
+        with self._cond:
+            # Like the real API, requesting an offset confirms all earlier updates
+            while self._updates and self._updates[0]["update_id"] < offset:
+                self._updates.popleft()
+            while not self._updates:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return []
+                self._cond.wait(remaining)
+            updates = [update for _, update in zip(range(limit), self._updates)]
+
+        self._count("updates_delivered", len(updates))
+        return updates
+
+    def _send_message(self, params: dict) -> dict:
+        chat_id = int(params["chat_id"])
+        text = params.get("text", "")
+        with self._cond:
+            message_id = self._next_message_id
+            self._next_message_id += 1
+
+        self._count("messages_sent")
+        if self.on_send_message is not None:
+            self.on_send_message(chat_id, text)
+
+        return {
+            "message_id": message_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": BOT_USER,
+            "text": text,
+        }
+
+    # ---------- HTTP Server ----------
+    def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Serve the API in a background thread and return the bot base URL."""
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = self.rfile.read(length).decode("utf-8") if length else ""
+                if self.headers.get("Content-Type", "").startswith("application/json"):
+                    params = json.loads(body or "{}")
+                else:
+                    params = dict(parse_qsl(body))
+
+                # Paths look like /bot<token>/<method>, or /fake/pushUpdate to inject an update
+                method = self.path.rstrip("/").rsplit("/", 1)[-1]
+                try:
+                    if self.path.startswith("/fake/"):
+                        api.push_update(int(params["user_id"]), params["text"])
+                        status, response = 200, {"ok": True, "result": True}
+                    else:
+                        status, response = api.call(method, params)
+                except (KeyError, ValueError) as e:
+                    status, response = 400, {"ok": False, "error_code": 400, "description": f"Bad Request: {e}"}
+
+                payload = json.dumps(response).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            do_GET = do_POST
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = APIServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+        host, port = self._server.server_address[:2]
+        logging.info(f"Fake Bot API listening on http://{host}:{port}")
+        return f"http://{host}:{port}/bot"
+
+    def stop(self):
+        """Stop serving and wake up pending long polls."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        with self._cond:
+            self._cond.notify_all()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local fake Telegram Bot API server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency", type=float, default=0.0, help="mean added latency per call, in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of calls answered with a 500")
+    parser.add_argument("--flood-rate", type=float, default=0.0, help="fraction of calls answered with a 429")
+    parser.add_argument("--retry-after", type=int, default=1, help="retry_after sent with 429 responses")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    api = FakeBotAPI(args.latency, args.error_rate, args.flood_rate, args.retry_after)
+    api.on_send_message = lambda chat_id, text: logging.info(f"sendMessage to {chat_id}: {text!r}")
+    api.start(args.host, args.port)
+
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        api.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 from datetime import datetime, date, timezone, timedelta
+from functools import lru_cache
 from telegram import Update
 
 from config import MIN_UTC_OFFSET, MAX_UTC_OFFSET
@@ -57,6 +58,7 @@ def get_user_tz(user_id: int) -> timezone:
     return timezone(timedelta(hours=offset))
 
 
+@lru_cache(maxsize=None)
 def offset_to_timezone(offset: int) -> timezone:
     """Convert an offset integer to a timezone object."""
     return timezone(timedelta(hours=offset))
@@ -1,20 +1,34 @@
 from telegram.ext import ApplicationBuilder, CommandHandler
 
-from config import TOKEN
+from config import TOKEN, API_URL, SNAPSHOT_INTERVAL, SCHEDULE_HORIZON
 from db_utils import init_db
 from handlers import help_command, set_timezone, set_daily, set_once, list_reminders, delete_reminder, set_language
-from scheduler import reload_all_reminders
+from scheduler import reload_all_reminders, schedule_deferred_reminders, snapshot_reminders, save_schedule_snapshot
 
 
 async def post_init(app):
     """Called after the application is initialized."""
     await reload_all_reminders(app)
+    app.job_queue.run_repeating(
+        snapshot_reminders, interval=SNAPSHOT_INTERVAL, first=SNAPSHOT_INTERVAL, name="snapshot"
+    )
+    app.job_queue.run_repeating(
+        schedule_deferred_reminders, interval=SCHEDULE_HORIZON / 2, first=SCHEDULE_HORIZON / 2, name="deferred"
+    )
+
+
+async def post_shutdown(app):
+    """Called after the application is shut down."""
+    await save_schedule_snapshot(app)
 
 
 def main():
     init_db()
 
-    app = ApplicationBuilder().token(TOKEN).post_init(post_init).build()
+    builder = ApplicationBuilder().token(TOKEN).post_init(post_init).post_shutdown(post_shutdown)
+    if API_URL:
+        builder = builder.base_url(API_URL)
+    app = builder.build()
 
     app.add_handler(CommandHandler("help", help_command))
     app.add_handler(CommandHandler("start", help_command))
@@ -1,9 +1,14 @@
+import asyncio
+import bisect
 import logging
+from collections import defaultdict
 from datetime import datetime, time, timezone
 from typing import Optional
 
-from db_utils import get_reminders, delete_user_reminder
-from helpers import format_time, format_offset, offset_to_timezone
+from config import SNAPSHOT_FILE, SCHEDULE_HORIZON
+from db_utils import delete_user_reminder, delete_reminders, get_change_seq, get_db_id, prune_changes
+from helpers import format_time
+from snapshot import load_snapshot, load_records_from_db, apply_changes, write_snapshot
 
 
 # ---------- Reminder Data ----------
@@ -37,6 +42,28 @@ async def send_reminder(context):
         delete_user_reminder(reminder_id)
 
 
+async def send_reminder_batch(context):
+    """Callback function that sends all reminders reloaded into one time slot."""
+    job = context.job
+    reminders = job.data["reminders"]
+
+    results = await asyncio.gather(
+        *(context.bot.send_message(chat_id=user_id, text=f"⏰ Reminder:\n{text}") for _, user_id, text in reminders),
+        return_exceptions=True,
+    )
+
+    sent = []
+    for (reminder_id, _, _), result in zip(reminders, results):
+        if isinstance(result, Exception):
+            logging.error(f"Failed to send reminder {reminder_id}: {result}")
+        else:
+            sent.append(reminder_id)
+
+    # One-time reminders are deleted from DB once sent, like in send_reminder
+    if job.data["once"] and sent:
+        delete_reminders(sent)
+
+
 # ---------- Scheduling Functions ----------
 def schedule_daily_reminder(job_queue, chat_id: int, run_time: time, data: dict, name: Optional[str] = None):
     """Schedule a daily recurring reminder."""
@@ -61,48 +88,179 @@ def schedule_once_reminder(job_queue, chat_id: int, delay_seconds: float, data:
 
 
 # ---------- Reload from Database ----------
+def load_schedule() -> tuple[dict, int, Optional[int]]:
+    """Load schedule records from the latest snapshot, or from the database if there is none.
+
+    Either way, reminders changed in the database since are replayed on top.
+    Returns the records, their change sequence number and the sequence number
+    of the snapshot file they were loaded from (None if they were not).
+    """
+    db_id = get_db_id()
+    snapshot = load_snapshot(SNAPSHOT_FILE, db_id)
+    if snapshot is not None and snapshot[1] > get_change_seq():
+        # The snapshot is ahead of the database (e.g. the DB was restored from a backup)
+        logging.warning("Ignoring scheduler snapshot newer than the database")
+        snapshot = None
+
+    if snapshot is not None:
+        records, seq = snapshot
+        snapshot_seq = seq
+        logging.info(f"Loaded {len(records)} reminders from snapshot (seq {seq})")
+    else:
+        records, seq = load_records_from_db()
+        snapshot_seq = None
+        logging.info(f"Found {len(records)} active reminders in DB")
+
+    seq = apply_changes(records, seq)
+    return records, seq, snapshot_seq
+
+
+def schedule_records(app, records: dict) -> int:
+    """Hand the schedule records to the job queue and return how many were scheduled.
+
+    Reminders that fire at the same time share a single job: daily ones are
+    grouped by UTC time of day (offsets are fixed, so a local HH:MM is always
+    the same UTC minute), one-time ones by run time. One-time reminders beyond
+    SCHEDULE_HORIZON are kept aside for schedule_deferred_reminders. Creating
+    APScheduler jobs is by far the most expensive part of a restart.
+    """
+    now = datetime.now(timezone.utc).timestamp()
+    horizon = now + SCHEDULE_HORIZON
+    daily_slots = defaultdict(list)
+    once_slots = defaultdict(list)
+    deferred = []
+    expired = []
+
+    for reminder_id, (user_id, rtype, hour, minute, run_at, text, offset) in records.items():
+        if rtype == "daily":
+            utc_minute = (hour * 60 + minute - offset * 60) % 1440
+            daily_slots[utc_minute].append((reminder_id, user_id, text))
+        elif run_at <= now:
+            expired.append(reminder_id)
+        elif run_at <= horizon:
+            once_slots[run_at].append((reminder_id, user_id, text))
+        else:
+            deferred.append((run_at, reminder_id, user_id, text))
+
+    for utc_minute, reminders in daily_slots.items():
+        run_time = time(hour=utc_minute // 60, minute=utc_minute % 60, tzinfo=timezone.utc)
+        app.job_queue.run_daily(
+            callback=send_reminder_batch,
+            time=run_time,
+            data={"reminders": reminders, "once": False},
+            name=f"daily-{format_time(run_time.hour, run_time.minute)}",
+        )
+    schedule_once_slots(app.job_queue, once_slots)
+
+    deferred.sort()
+    app.bot_data["deferred"] = deferred
+
+    # One-time reminders that expired while the bot was down will never run:
+    # drop them so they stop being reloaded and snapshotted on every restart.
+    if expired:
+        for reminder_id in expired:
+            del records[reminder_id]
+        try:
+            delete_reminders(expired)
+        except Exception as e:
+            logging.error(f"Failed to delete expired one-time reminders: {e}")
+        logging.info(f"Removed {len(expired)} expired one-time reminders")
+
+    logging.info(
+        f"Scheduled {len(records) - len(deferred)} reminders in {len(daily_slots) + len(once_slots)} jobs, "
+        f"{len(deferred)} one-time reminders deferred"
+    )
+    return len(records) - len(deferred)
+
+
+def schedule_once_slots(job_queue, once_slots: dict):
+    """Schedule one job per run time (a UTC timestamp) for the given one-time reminders."""
+    for run_at, reminders in once_slots.items():
+        job_queue.run_once(
+            callback=send_reminder_batch,
+            when=datetime.fromtimestamp(run_at, timezone.utc),
+            data={"reminders": reminders, "once": True},
+            name=f"once-{int(run_at)}",
+        )
+
+
 async def reload_all_reminders(app):
-    """Reload all active reminders from the database on startup."""
-    logging.info("Reloading reminders from database...")
+    """Reload all active reminders on startup."""
+    logging.info("Reloading reminders...")
 
     try:
-        rows = get_reminders()
+        records, seq, snapshot_seq = load_schedule()
     except Exception as e:
         logging.error(f"Failed to load reminders from database: {e}")
         return
 
-    logging.info(f"Found {len(rows)} active reminders in DB")
+    schedule_records(app, records)
+    app.bot_data["schedule"] = records
+    app.bot_data["schedule_seq"] = seq
+    app.bot_data["snapshot_seq"] = snapshot_seq
 
-    for reminder_id, user_id, rtype, hour, minute, run_at, text, offset in rows:
-        chat_id = int(user_id)
-        user_tz = offset_to_timezone(offset)
+    logging.info("Reminder reload complete")
 
-        if rtype == "daily":
-            reminder_time = time(hour=hour, minute=minute, tzinfo=user_tz)
-            data = build_reminder_data(user_id, text, reminder_id, offset)
-
-            schedule_daily_reminder(
-                app.job_queue, chat_id, reminder_time, data, name=f"daily-{reminder_id}"
-            )
-            logging.info(f"Reloaded DAILY reminder {reminder_id} at {format_time(hour, minute)} {format_offset(offset)}")
-
-        elif rtype == "once":
-            now = datetime.now(timezone.utc)
-            # Parse run_at string to datetime
-            if isinstance(run_at, str):
-                run_at = datetime.fromisoformat(run_at.replace("Z", "+00:00"))
-            if run_at.tzinfo is None:
-                run_at = run_at.replace(tzinfo=timezone.utc)
-
-            delay = (run_at - now).total_seconds()
-
-            if delay > 0:
-                data = build_reminder_data(user_id, text, reminder_id)
-                schedule_once_reminder(
-                    app.job_queue, chat_id, delay, data, name=f"once-{reminder_id}"
-                )
-                logging.info(f"Reloaded ONCE reminder {reminder_id} in {delay:.1f}s")
-            else:
-                logging.info(f"Skipping expired one-time reminder {reminder_id}")
 
-    logging.info("Reminder reload complete")
+async def schedule_deferred_reminders(context):
+    """Periodic job that schedules deferred one-time reminders coming within SCHEDULE_HORIZON."""
+    deferred = context.application.bot_data.get("deferred")
+    if not deferred:
+        return
+
+    now = datetime.now(timezone.utc).timestamp()
+    count = bisect.bisect_right(deferred, (now + SCHEDULE_HORIZON, float("inf")))
+    # Skip reminders deleted since startup, as of the last snapshot sync
+    records = context.application.bot_data["schedule"]
+    once_slots = defaultdict(list)
+    for run_at, reminder_id, user_id, text in deferred[:count]:
+        if reminder_id in records:
+            once_slots[run_at].append((reminder_id, user_id, text))
+    del deferred[:count]
+
+    schedule_once_slots(context.job_queue, once_slots)
+    logging.info(f"Scheduled {count} deferred one-time reminders, {len(deferred)} still deferred")
+
+
+# ---------- Snapshots ----------
+async def snapshot_reminders(context):
+    """Periodic job that brings the in-memory schedule up to date and snapshots it."""
+    await save_schedule_snapshot(context.application)
+
+
+def sync_schedule_snapshot(records: dict, seq: int, snapshot_seq: Optional[int]) -> int:
+    """Replay database changes into `records`, write the snapshot and prune the change log.
+
+    The write is skipped when nothing changed since the snapshot file on disk
+    (at `snapshot_seq`). Runs in a worker thread, so it must be given its own
+    copy of the schedule. Returns the new change sequence number.
+    """
+    seq = apply_changes(records, seq)
+    if seq == snapshot_seq and SNAPSHOT_FILE.exists():
+        return seq
+
+    write_snapshot(SNAPSHOT_FILE, records, seq, get_db_id())
+    prune_changes(seq)
+    logging.info(f"Wrote scheduler snapshot of {len(records)} reminders (seq {seq})")
+    return seq
+
+
+async def save_schedule_snapshot(app):
+    """Bring the in-memory schedule up to date with the database and write it to disk."""
+    records = app.bot_data.get("schedule")
+    if records is None:
+        return
+
+    # Copy on the event loop, then do all database and file work off it
+    records = dict(records)
+    try:
+        seq = await asyncio.to_thread(
+            sync_schedule_snapshot, records, app.bot_data["schedule_seq"], app.bot_data["snapshot_seq"]
+        )
+    except Exception as e:
+        logging.error(f"Failed to write scheduler snapshot: {e}")
+        return
+
+    app.bot_data["schedule"] = records
+    app.bot_data["schedule_seq"] = seq
+    app.bot_data["snapshot_seq"] = seq
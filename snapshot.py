@@ -0,0 +1,139 @@
+import logging
+import mmap
+import os
+import struct
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+from db_utils import get_reminders, get_reminders_by_ids, get_change_seq, get_changes_since
+
+# File layout:
+#   header:  magic, format version, DB identity, DB change sequence number, record count
+#   records: fixed-size, one per reminder
+#   texts:   UTF-8 reminder texts, referenced by (offset, length) from records
+SNAPSHOT_MAGIC = b"RMSN"
+SNAPSHOT_VERSION = 2
+HEADER = struct.Struct("<4sHxx16sQI")
+# id, user_id, type, hour, minute, timezone offset, run_at (UTC timestamp), text offset, text length
+RECORD = struct.Struct("<qqBBBbdII")
+
+REMINDER_TYPES = ("daily", "once")
+
+
+# ---------- Records ----------
+def row_to_record(row) -> tuple:
+    """Convert a reminder DB row into an in-memory schedule record.
+
+    A record is (user_id, type, hour, minute, run_at, text, offset), where
+    run_at is a UTC timestamp for one-time reminders and None for daily ones.
+    """
+    _, user_id, rtype, hour, minute, run_at, text, offset = row
+    if rtype == "once":
+        # Parse run_at string to a timestamp once, here, rather than on every restart
+        if isinstance(run_at, str):
+            run_at = datetime.fromisoformat(run_at.replace("Z", "+00:00"))
+        if run_at.tzinfo is None:
+            run_at = run_at.replace(tzinfo=timezone.utc)
+        run_at = run_at.timestamp()
+    else:
+        run_at = None
+    return int(user_id), rtype, hour, minute, run_at, text, offset
+
+
+def load_records_from_db() -> tuple[dict, int]:
+    """Build the schedule records from a full read of the database.
+
+    Returns the records keyed by reminder ID and the change sequence number
+    they are up to date with.
+    """
+    # Read the sequence number first: anything changed during the read is
+    # replayed again later, which is harmless.
+    seq = get_change_seq()
+    records = {row[0]: row_to_record(row) for row in get_reminders()}
+    return records, seq
+
+
+def apply_changes(records: dict, seq: int) -> int:
+    """Replay reminders changed in the database since `seq` into `records`.
+
+    Returns the new change sequence number.
+    """
+    reminder_ids, new_seq = get_changes_since(seq)
+    if not reminder_ids:
+        return seq
+
+    for reminder_id in reminder_ids:
+        records.pop(reminder_id, None)
+    for row in get_reminders_by_ids(reminder_ids):
+        records[row[0]] = row_to_record(row)
+
+    logging.info(f"Replayed {len(reminder_ids)} changed reminders (seq {seq} -> {new_seq})")
+    return new_seq
+
+
+# ---------- Snapshot File ----------
+def write_snapshot(path: Path, records: dict, seq: int, db_id: bytes):
+    """Atomically write the schedule records to a snapshot file."""
+    texts = bytearray()
+    body = bytearray(RECORD.size * len(records))
+
+    for i, (reminder_id, (user_id, rtype, hour, minute, run_at, text, offset)) in enumerate(records.items()):
+        encoded = text.encode("utf-8")
+        RECORD.pack_into(
+            body, i * RECORD.size,
+            reminder_id, user_id, REMINDER_TYPES.index(rtype), hour or 0, minute or 0, offset,
+            run_at or 0.0, len(texts), len(encoded),
+        )
+        texts += encoded
+
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, db_id, seq, len(records)))
+        f.write(body)
+        f.write(texts)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def load_snapshot(path: Path, db_id: bytes) -> Optional[tuple[dict, int]]:
+    """Load schedule records from a snapshot file of the database `db_id`.
+
+    Returns the records and their change sequence number, or None if the
+    snapshot is missing, unreadable, from another format version or taken
+    from another database.
+    """
+    try:
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, \
+                memoryview(mm) as view:
+            if len(view) < HEADER.size:
+                return None
+            magic, version, snapshot_db_id, seq, count = HEADER.unpack_from(view)
+            if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+                logging.warning(f"Ignoring snapshot {path}: unsupported format")
+                return None
+            if snapshot_db_id != db_id:
+                logging.warning(f"Ignoring snapshot {path}: taken from another database")
+                return None
+
+            texts_start = HEADER.size + RECORD.size * count
+            if len(view) < texts_start:
+                logging.warning(f"Ignoring truncated snapshot {path}")
+                return None
+
+            records = {}
+            with view[HEADER.size:texts_start] as body, view[texts_start:] as texts:
+                for reminder_id, user_id, rtype, hour, minute, offset, run_at, text_start, text_len in \
+                        RECORD.iter_unpack(body):
+                    text = str(texts[text_start:text_start + text_len], "utf-8")
+                    if rtype == 0:
+                        records[reminder_id] = (user_id, "daily", hour, minute, None, text, offset)
+                    else:
+                        records[reminder_id] = (user_id, "once", None, None, run_at, text, offset)
+            return records, seq
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, struct.error) as e:
+        logging.warning(f"Ignoring unreadable snapshot {path}: {e}")
+        return None
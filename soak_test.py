@@ -0,0 +1,365 @@
+"""Soak test the bot against the local fake Bot API.
+
+Starts fake_bot_api.py in-process, launches main.py pointed at it (in a
+scratch directory, with its own database), then simulates users issuing
+/set, /setdaily, /list and /delete while their reminders fire. Throughput,
+command reply latency, reminder delivery lag and error counts are reported
+periodically and at the end.
+
+Usage:
+    python soak_test.py [--users 2000] [--duration 600] [--think 30]
+                        [--latency 0.05] [--error-rate 0.01] [--flood-rate 0.01]
+"""
+import argparse
+import heapq
+import logging
+import os
+import random
+import re
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict, deque
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from fake_bot_api import FakeBotAPI
+from i18n import MESSAGES
+
+BOT_SCRIPT = Path(__file__).resolve().parent / "main.py"
+
+REMINDER_PREFIX = "⏰ Reminder"
+ERROR_PREFIX = "❌"
+TOKEN_RE = re.compile(r"soak-(\d+)")
+LIST_ITEM_RE = re.compile(r"n°(\d+) \|.*?soak-(\d+)")
+MISSING_ID_RE = re.compile(r"(\d+)")
+
+# Relative weights of the simulated commands
+COMMANDS = {"set": 40, "setdaily": 10, "list": 30, "delete": 20}
+
+# Which command each bot reply answers, keyed by the reply's i18n message.
+# A successful /delete sends no reply, so /delete is never waited for and its
+# "does not exist" replies are counted on their own.
+REPLY_COMMANDS = {
+    "set_once_reminder_success": "set",
+    "set_once_reminder_usage": "set",
+    "time_not_in_future": "set",
+    "set_daily_reminder_success": "setdaily",
+    "set_daily_reminder_usage": "setdaily",
+    "invalid_time": "setdaily",
+    "reminder_list_header": "list",
+    "no_reminders": "list",
+    "reminder_does_not_exist": "delete",
+}
+# Fixed text each of those replies starts with (simulated users speak English)
+REPLY_PREFIXES = [(MESSAGES["en"][key].split("{", 1)[0], command) for key, command in REPLY_COMMANDS.items()]
+
+
+def percentile(ordered: list, fraction: float) -> float:
+    """Nearest-rank percentile of the sorted list `ordered` (0.0 if empty)."""
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def reply_command(text: str):
+    """Name of the command a bot reply answers, or None if unrecognized."""
+    body = text[2:] if text[:1] in "✅❌" else text
+    for prefix, command in REPLY_PREFIXES:
+        if body.startswith(prefix):
+            return command
+    return None
+
+
+class SoakStats:
+    """Measurements shared between the driver and the fake API threads."""
+
+    def __init__(self, reply_timeout: float):
+        self.lock = threading.Lock()
+        self.reply_timeout = reply_timeout
+        self.started = time.monotonic()
+        self.commands_sent = defaultdict(int)
+        self.replies = 0
+        self.error_replies = 0
+        self.unmatched_replies = 0
+        self.unanswered = defaultdict(int)
+        self.delete_misses = 0
+        self.reply_latencies = []
+        self.reminders_delivered = 0
+        self.delivery_lags = []
+        # Per chat and command: send times of commands still waiting for a reply
+        self.pending = defaultdict(deque)
+        # Per chat: reminder ID -> token, from the last /list reply
+        self.known_ids = defaultdict(dict)
+        self.reminders_set = 0
+        # Reminder token -> due time (UTC timestamp), for reminders not yet delivered or deleted
+        self.due = {}
+        # Daily reminder token -> first due time, to measure the lag of later deliveries
+        self.daily = {}
+        # Reminder token -> (due time, time the /delete was sent), until the /delete is resolved
+        self.deleting = {}
+
+    def on_send_message(self, chat_id: int, text: str):
+        now = time.time()
+        with self.lock:
+            if text.startswith(REMINDER_PREFIX):
+                match = TOKEN_RE.search(text)
+                if match:
+                    token = match.group(1)
+                    due = self.due.pop(token, None)
+                    if token in self.daily:
+                        self.delivery_lags.append((now - self.daily[token]) % 86400)
+                    elif due is not None:
+                        self.delivery_lags.append(now - due)
+                    self.reminders_delivered += 1
+                return
+
+            self.replies += 1
+            if text.startswith(ERROR_PREFIX):
+                self.error_replies += 1
+
+            command = reply_command(text)
+            if command == "delete":
+                # The reminder was already gone (most often: it has fired)
+                self.delete_misses += 1
+                match = MISSING_ID_RE.search(text)
+                token = self.known_ids[chat_id].get(int(match.group(1))) if match else None
+                if token in self.deleting:
+                    # Not deleted by us after all: still expected if it has not arrived
+                    self.due[token] = self.deleting.pop(token)[0]
+                return
+            if command == "list":
+                self.known_ids[chat_id] = {int(i): token for i, token in LIST_ITEM_RE.findall(text)}
+
+            queue = self.pending.get((chat_id, command))
+            # Commands already past the timeout stay unanswered, even if a late reply arrives
+            while queue and now - queue[0] > self.reply_timeout:
+                queue.popleft()
+                self.unanswered[command] += 1
+            if queue:
+                self.reply_latencies.append(now - queue.popleft())
+            else:
+                self.unmatched_replies += 1
+
+    def expire_pending(self, now: float):
+        """Count commands left without a reply for longer than the timeout as unanswered.
+
+        /delete commands past the timeout without a "does not exist" reply are
+        taken as successful.
+        """
+        with self.lock:
+            for (_, command), queue in self.pending.items():
+                while queue and now - queue[0] > self.reply_timeout:
+                    queue.popleft()
+                    self.unanswered[command] += 1
+            expired = [token for token, (_, sent_at) in self.deleting.items() if now - sent_at > self.reply_timeout]
+            for token in expired:
+                del self.deleting[token]
+
+    def pending_count(self) -> int:
+        with self.lock:
+            return sum(len(queue) for queue in self.pending.values())
+
+    def undelivered_reminders(self, until: float) -> int:
+        """Reminders due by `until` that were neither delivered nor deleted."""
+        # The fake API's handler threads take the lock before answering
+        # sendMessage, so only copy under it
+        with self.lock:
+            due_times = list(self.due.values())
+        return sum(1 for due in due_times if due <= until)
+
+    def report(self, api: FakeBotAPI, title: str, until: float):
+        # Only copy under the lock: sorting and scanning happen outside it
+        undelivered = self.undelivered_reminders(until)
+        with self.lock:
+            reply_latencies = list(self.reply_latencies)
+            delivery_lags = list(self.delivery_lags)
+            commands_sent = dict(self.commands_sent)
+            unanswered = dict(self.unanswered)
+            replies, error_replies, unmatched_replies = self.replies, self.error_replies, self.unmatched_replies
+            delete_misses, reminders_set, reminders_delivered = \
+                self.delete_misses, self.reminders_set, self.reminders_delivered
+
+        reply_latencies.sort()
+        delivery_lags.sort()
+        elapsed = time.monotonic() - self.started
+        sent = sum(commands_sent.values())
+        per_command = ", ".join(f"/{name} {count}" for name, count in sorted(commands_sent.items()))
+        per_unanswered = ", ".join(f"/{name} {count}" for name, count in sorted(unanswered.items()))
+        stats = api.stats
+        lines = [
+            f"--- {title} after {elapsed:.0f}s ---",
+            f"commands sent:       {sent} ({sent / elapsed:.1f}/s): {per_command}",
+            f"replies:             {replies} ({replies / elapsed:.1f}/s), "
+            f"{error_replies} error replies, {unmatched_replies} unmatched or late",
+            f"unanswered commands: {sum(unanswered.values())} (no reply within {self.reply_timeout:.0f}s)"
+            + (f": {per_unanswered}" if per_unanswered else ""),
+            f"/delete misses:      {delete_misses} (reminder already gone)",
+            f"reply latency:       p50 {percentile(reply_latencies, 0.5) * 1000:.0f}ms, "
+            f"p95 {percentile(reply_latencies, 0.95) * 1000:.0f}ms, "
+            f"p99 {percentile(reply_latencies, 0.99) * 1000:.0f}ms",
+            f"reminders:           {reminders_set} set, {reminders_delivered} delivered, "
+            f"{undelivered} due but undelivered",
+            f"delivery lag:        p50 {percentile(delivery_lags, 0.5):.2f}s, "
+            f"p95 {percentile(delivery_lags, 0.95):.2f}s, "
+            f"max {delivery_lags[-1] if delivery_lags else 0.0:.2f}s",
+            f"fake API:            {stats['calls:getUpdates']} getUpdates, "
+            f"{stats['calls:sendMessage']} sendMessage, {stats['error_responses']} injected errors, "
+            f"{stats['flood_responses']} injected 429s, {api.pending_updates()} updates pending",
+        ]
+        print("\n".join(lines), flush=True)
+
+
+def next_command(user_id: int, stats: SoakStats, rng: random.Random) -> tuple[str, str]:
+    """Pick the next command for a user, returning its name and full text."""
+    name = rng.choices(list(COMMANDS), weights=list(COMMANDS.values()))[0]
+
+    if name == "delete":
+        with stats.lock:
+            known = stats.known_ids.get(user_id)
+            if known:
+                reminder_id, token = known.popitem()
+                if token in stats.due:
+                    stats.deleting[token] = (stats.due.pop(token), time.time())
+                stats.daily.pop(token, None)
+                return name, f"/delete {reminder_id}"
+        name = "list"
+
+    if name == "list":
+        return name, "/list"
+
+    # Simulated users never set a timezone, so their reminders run in UTC
+    run_at = (datetime.now(timezone.utc) + timedelta(minutes=rng.randint(1, 5))).replace(second=0, microsecond=0)
+    with stats.lock:
+        token = str(stats.reminders_set)
+        stats.reminders_set += 1
+        stats.due[token] = run_at.timestamp()
+        if name == "setdaily":
+            stats.daily[token] = run_at.timestamp()
+
+    if name == "set":
+        return name, f"/set {run_at:%Y-%m-%d %H:%M} soak-{token}"
+    return name, f"/setdaily {run_at:%H:%M} soak-{token}"
+
+
+def start_bot(base_url: str, workdir: Path) -> subprocess.Popen:
+    """Launch main.py against the fake API, with its database and log in `workdir`."""
+    env = dict(os.environ, TELEGRAM_TOKEN="123456:SOAK-TEST", TELEGRAM_API_URL=base_url)
+    # The child keeps its own copy of the file descriptor
+    with open(workdir / "bot.log", "wb") as log:
+        return subprocess.Popen(
+            [sys.executable, str(BOT_SCRIPT)], cwd=workdir, env=env, stdout=log, stderr=subprocess.STDOUT
+        )
+
+
+def wait_for_bot(api: FakeBotAPI, bot: subprocess.Popen, timeout: float = 30):
+    """Wait until the bot starts polling for updates."""
+    deadline = time.monotonic() + timeout
+    while api.stats["calls:getUpdates"] == 0:
+        if bot.poll() is not None:
+            raise RuntimeError(f"Bot exited with code {bot.returncode} before polling")
+        if time.monotonic() > deadline:
+            raise RuntimeError("Bot did not start polling in time")
+        time.sleep(0.1)
+
+
+def run(args, api: FakeBotAPI, stats: SoakStats):
+    """Drive the simulated users until the run duration is over."""
+    rng = random.Random(args.seed)
+    # (time of next command, user ID), spread over the first think period
+    queue = [(time.monotonic() + rng.uniform(0, args.think), user_id) for user_id in range(1, args.users + 1)]
+    heapq.heapify(queue)
+
+    stats.started = time.monotonic()
+    end = stats.started + args.duration
+    next_report = stats.started + args.report_interval
+
+    while True:
+        now = time.monotonic()
+        if now >= end:
+            break
+        if now >= next_report:
+            stats.expire_pending(time.time())
+            # Leave in-flight reminders the same grace period as replies
+            stats.report(api, "progress", until=time.time() - args.reply_timeout)
+            next_report += args.report_interval
+
+        when, user_id = queue[0]
+        if when > now:
+            time.sleep(min(when, next_report, end) - now)
+            continue
+
+        name, text = next_command(user_id, stats, rng)
+        with stats.lock:
+            stats.commands_sent[name] += 1
+            if name != "delete":
+                stats.pending[(user_id, name)].append(time.time())
+        api.push_update(user_id, text)
+
+        heapq.heapreplace(queue, (now + rng.expovariate(1 / args.think), user_id))
+
+
+def drain(stats: SoakStats, run_end: float):
+    """Wait for outstanding replies and reminders due by `run_end`, then give up on the rest."""
+    deadline = time.monotonic() + stats.reply_timeout
+    while time.monotonic() < deadline:
+        if stats.pending_count() == 0 and stats.undelivered_reminders(run_end) == 0:
+            break
+        time.sleep(0.5)
+    stats.expire_pending(float("inf"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Soak test the bot against the local fake Bot API")
+    parser.add_argument("--users", type=int, default=2000, help="number of simulated users")
+    parser.add_argument("--duration", type=float, default=600, help="length of the run, in seconds")
+    parser.add_argument("--think", type=float, default=30, help="mean seconds between a user's commands")
+    parser.add_argument("--reply-timeout", type=float, default=30,
+                        help="seconds after which a command without a reply counts as unanswered")
+    parser.add_argument("--report-interval", type=float, default=30, help="seconds between progress reports")
+    parser.add_argument("--latency", type=float, default=0.0, help="mean added latency per API call, in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of API calls answered with a 500")
+    parser.add_argument("--flood-rate", type=float, default=0.0, help="fraction of API calls answered with a 429")
+    parser.add_argument("--retry-after", type=int, default=1, help="retry_after sent with 429 responses")
+    parser.add_argument("--workdir", type=Path, help="directory for the bot's database and log (default: temporary)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    stats = SoakStats(args.reply_timeout)
+    api = FakeBotAPI(args.latency, args.error_rate, args.flood_rate, args.retry_after, seed=args.seed)
+    api.on_send_message = stats.on_send_message
+    base_url = api.start()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = args.workdir or Path(tmp)
+        workdir.mkdir(parents=True, exist_ok=True)
+        bot = start_bot(base_url, workdir)
+        run_end = time.time()
+        try:
+            wait_for_bot(api, bot)
+            run(args, api, stats)
+            run_end = time.time()
+            drain(stats, run_end)
+        except KeyboardInterrupt:
+            run_end = time.time()
+        finally:
+            # SIGINT lets the bot shut down cleanly
+            bot.send_signal(signal.SIGINT)
+            try:
+                bot.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                bot.kill()
+            api.stop()
+
+        stats.expire_pending(float("inf"))
+        stats.report(api, "final", until=run_end)
+        if bot.returncode not in (0, -signal.SIGINT):
+            print(f"Bot exited with code {bot.returncode}, see {workdir / 'bot.log'}")
+
+
+if __name__ == "__main__":
+    main()